@@ -1,14 +1,27 @@
 import os
 import time
-import json
+import asyncio
+import math
+import atexit
 import logging
 import random
-from typing import List, Dict, Any, Optional
+import shutil
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from web3 import Web3
 from web3.types import LogReceipt
-from eth_abi import decode as abi_decode
+from eth_abi import encode as abi_encode
+from eth_abi.abi import default_codec
+from eth_abi.exceptions import DecodingError
+from hexbytes import HexBytes
+from eth_utils import event_abi_to_log_topic, keccak, to_checksum_address
 
 # --- Configuration ---
 # Configure logging to provide detailed output.
@@ -17,6 +30,7 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - [%(module)s] - %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
+logger = logging.getLogger(__name__)
 
 # --- Constants and Mock Data ---
 # In a real-world scenario, these would be managed securely.
@@ -27,6 +41,19 @@ STATE_FILE = 'state.json'
 POLLING_INTERVAL_SECONDS = 10
 BLOCK_PROCESSING_BATCH_SIZE = 100 # Process up to 100 blocks at a time
 CONFIRMATIONS_REQUIRED = 6 # Number of blocks to wait before considering an event final
+MAX_EVENTS_PER_BLOCK = 20 # Expected upper bound of bridge events in a single block
+# Duplicates only arise from re-scanning at most one batch of blocks after a restart, so the
+# exact window must hold every event such a batch can contain.
+RECENT_EVENTS_WINDOW = BLOCK_PROCESSING_BATCH_SIZE * MAX_EVENTS_PER_BLOCK
+STATE_COMPACTION_INTERVAL_SECONDS = 60 # Minimum time between folding the WAL into the state file
+STATE_COMPACTION_MAX_WAL_RECORDS = 1000 # Compact early once the WAL holds this many records
+LISTENER_WORKER_THREADS = 8 # Threads for blocking connector and state file I/O
+RELAY_MAX_CONCURRENCY = 10 # Relay transactions in flight at once
+GET_LOGS_BLOCK_RANGE = 10 # Blocks covered by a single eth_getLogs request
+RPC_BATCH_MAX_REQUESTS = 20 # Requests packed into one JSON-RPC batch
+RPC_MAX_CONCURRENT_BATCHES = 10
+RPC_TIMEOUT_SECONDS = 5
+MOCK_RPC_ROUND_TRIP_SECONDS = 0.05 # Simulated network latency of one JSON-RPC request
 
 # Mock ABI for a simple bridge contract event.
 # This simulates the event signature for: event TokensLocked(address indexed user, address indexed token, uint256 amount, uint256 destinationChainId);
@@ -43,35 +70,202 @@ BRIDGE_ABI = [
         "type": "event"
     }
 ]
-EVENT_SIGNATURE_HASH = Web3.keccak(text="TokensLocked(address,address,uint256,uint256)").hex()
+# Kept as raw bytes so topic filtering is a plain 32-byte comparison.
+EVENT_SIGNATURE_HASH = bytes(Web3.keccak(text="TokensLocked(address,address,uint256,uint256)"))
+
+class RecentEventWindow:
+    """The most recent event hashes in insertion order, with O(1) membership and eviction."""
+    def __init__(self, maxlen: int, event_hashes: Iterable[bytes] = ()):
+        self._order = deque(maxlen=maxlen)
+        self._members = set()
+        for event_hash in event_hashes:
+            self.add(event_hash)
+
+    def add(self, event_hash: bytes):
+        if event_hash in self._members:
+            return
+        if len(self._order) == self._order.maxlen:
+            # The bounded deque drops its oldest entry on append; drop it from the set too.
+            self._members.discard(self._order[0])
+        self._order.append(event_hash)
+        self._members.add(event_hash)
+
+    def __contains__(self, event_hash: bytes) -> bool:
+        return event_hash in self._members
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+def _event_hash_from_hex(value: str) -> bytes:
+    """Parses a persisted event hash, with or without a 0x prefix."""
+    return bytes.fromhex(value.removeprefix('0x'))
+
 
 class StateDB:
-    """Manages the persistent state of the listener, such as the last processed block."""
-    def __init__(self, filepath: str):
+    """Manages the persistent state of the listener, such as the last processed block.
+
+    Updates are appended to a write-ahead log next to the state file and periodically
+    compacted into a full snapshot, so each update costs one small record instead of a
+    rewrite of the whole state. Given an executor, compaction writes run in the background.
+    """
+    def __init__(self, filepath: str, executor: Optional[Executor] = None):
         self.filepath = filepath
+        self.wal_filepath = os.path.splitext(filepath)[0] + '.wal'
+        # Records rotated out of the live WAL, kept until a snapshot containing them is on disk.
+        self.compacting_wal_filepath = f"{self.wal_filepath}.compacting"
+        self.executor = executor
         self.state = self._load_state()
+        # Earlier versions also kept a Bloom filter; its fields are no longer used.
+        self.state.pop("bloom", None)
+        self.state.pop("bloom_count", None)
+        self.recent_event_hashes = RecentEventWindow(
+            RECENT_EVENTS_WINDOW,
+            (_event_hash_from_hex(h) for h in self.state.get("recent_event_hashes", []))
+        )
+        # Older state files keyed events by keccak over formatted text; those keys can never
+        # match the current byte keys, so they are discarded rather than migrated.
+        self.state.pop("processed_event_hashes", None)
+        self._wal_records = self._replay_wal(self.compacting_wal_filepath) + self._replay_wal(self.wal_filepath)
+        self._wal = open(self.wal_filepath, 'ab', buffering=1 << 16)
+        self._last_compaction = time.monotonic()
+        self._compaction: Optional[Future] = None
+        atexit.register(self.close)
 
     def _load_state(self) -> Dict[str, Any]:
         """Loads the state from a JSON file, creating it if it doesn't exist."""
         try:
-            with open(self.filepath, 'r') as f:
-                logging.info(f"Loading state from {self.filepath}")
-                return json.load(f)
+            with open(self.filepath, 'rb') as f:
+                logger.info("Loading state from %s", self.filepath)
+                return orjson.loads(f.read())
         except FileNotFoundError:
-            logging.warning(f"State file not found. Initializing with default state.")
-            return {"last_processed_block": 0, "processed_event_hashes": []}
-        except json.JSONDecodeError:
-            logging.error(f"Error decoding state file. Starting with fresh state.")
-            return {"last_processed_block": 0, "processed_event_hashes": []}
-
-    def save_state(self):
-        """Saves the current state to the JSON file."""
+            logger.warning("State file not found. Initializing with default state.")
+            return {"last_processed_block": 0}
+        except orjson.JSONDecodeError:
+            logger.error("Error decoding state file. Starting with fresh state.")
+            return {"last_processed_block": 0}
+
+    def _replay_wal(self, wal_filepath: str) -> int:
+        """Applies the records logged since the last snapshot and returns how many were replayed."""
+        replayed = 0
+        valid_length = 0
         try:
-            with open(self.filepath, 'w') as f:
-                json.dump(self.state, f, indent=4)
-                logging.debug(f"State successfully saved to {self.filepath}")
+            # Records are decoded one line at a time straight from the binary stream.
+            with open(wal_filepath, 'rb') as f:
+                for line in f:
+                    # Each record is written together with its newline, so a line without one is torn.
+                    try:
+                        record = orjson.loads(line) if line.endswith(b'\n') else None
+                    except orjson.JSONDecodeError:
+                        record = None
+                    if record is None:
+                        # Only the final record can be torn by a crash; everything before it is intact.
+                        logger.warning("Ignoring truncated record at the end of %s", wal_filepath)
+                        # Cut it off so new records are not appended onto the partial line.
+                        os.truncate(wal_filepath, valid_length)
+                        break
+                    if "block" in record:
+                        self.state["last_processed_block"] = record["block"]
+                    elif "event" in record:
+                        self.recent_event_hashes.add(_event_hash_from_hex(record["event"]))
+                    replayed += 1
+                    valid_length += len(line)
+        except FileNotFoundError:
+            return 0
+        if replayed:
+            logger.info("Replayed %s records from %s", replayed, wal_filepath)
+        return replayed
+
+    def _append_wal(self, record: Dict[str, Any]):
+        self._wal.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+        self._wal_records += 1
+
+    def _rotate_wal(self):
+        """Moves the live WAL aside for compaction and starts a fresh one."""
+        self._wal.close()
+        if os.path.exists(self.compacting_wal_filepath):
+            # A previous compaction failed; keep its records ahead of the newer ones.
+            with open(self.compacting_wal_filepath, 'ab') as dst, open(self.wal_filepath, 'rb') as src:
+                shutil.copyfileobj(src, dst)
+            os.remove(self.wal_filepath)
+        else:
+            os.replace(self.wal_filepath, self.compacting_wal_filepath)
+        self._wal = open(self.wal_filepath, 'ab', buffering=1 << 16)
+        self._wal_records = 0
+
+    def maybe_flush(self, force: bool = False):
+        """Pushes buffered WAL records to the OS and compacts the WAL into the state file when due.
+
+        Compaction happens once STATE_COMPACTION_INTERVAL_SECONDS have passed or the WAL holds
+        STATE_COMPACTION_MAX_WAL_RECORDS records, or unconditionally with `force`. Forced
+        compactions, and any made without an executor, complete before this returns.
+        """
+        if self._wal.closed:
+            return
+        # No fsync here: the WAL only needs to survive a process crash between compactions.
+        self._wal.flush()
+        if self._reap_compaction(wait=force):
+            return
+        if not self._wal_records:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_compaction < STATE_COMPACTION_INTERVAL_SECONDS \
+                and self._wal_records < STATE_COMPACTION_MAX_WAL_RECORDS:
+            return
+
+        # Capture the snapshot here, so a background write never sees state mid-update.
+        self.state["recent_event_hashes"] = [event_hash.hex() for event_hash in self.recent_event_hashes]
+        snapshot = dict(self.state)
+        self._rotate_wal()
+        self._last_compaction = now
+        if force or self.executor is None:
+            self._write_snapshot(snapshot)
+        else:
+            self._compaction = self.executor.submit(self._write_snapshot, snapshot)
+
+    def _reap_compaction(self, wait: bool) -> bool:
+        """Returns True while a background compaction is still running, logging one that failed."""
+        if self._compaction is None:
+            return False
+        if not wait and not self._compaction.done():
+            return True
+        error = self._compaction.exception()
+        self._compaction = None
+        if error is not None:
+            # The rotated records stay on disk and are carried into the next compaction.
+            logger.error("Background compaction of %s failed: %r", self.filepath, error)
+        return False
+
+    def _write_snapshot(self, snapshot: Dict[str, Any]):
+        tmp_path = f"{self.filepath}.tmp"
+        try:
+            # Write to a temporary file and rename it so a crash never leaves a truncated state file.
+            with open(tmp_path, 'wb', buffering=1 << 20) as f:
+                f.write(orjson.dumps(snapshot, option=orjson.OPT_INDENT_2))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.filepath)
         except IOError as e:
-            logging.error(f"Failed to save state to {self.filepath}: {e}")
+            logger.error("Failed to save state to %s: %s", self.filepath, e)
+            return
+        logger.debug("State successfully saved to %s", self.filepath)
+        try:
+            # The snapshot now covers every rotated record, so they can be dropped.
+            os.remove(self.compacting_wal_filepath)
+        except IOError as e:
+            # Harmless: replaying records already in the snapshot is idempotent.
+            logger.warning("State saved, but failed to remove %s: %s", self.compacting_wal_filepath, e)
+
+    def close(self):
+        """Compacts outstanding WAL records and closes the log. Safe to call more than once."""
+        if self._wal.closed:
+            return
+        self.maybe_flush(force=True)
+        os.fsync(self._wal.fileno())
+        self._wal.close()
 
     def get_last_processed_block(self) -> int:
         """Returns the last block number that was successfully processed."""
@@ -80,32 +274,96 @@ class StateDB:
     def set_last_processed_block(self, block_number: int):
         """Updates the last processed block number in the state."""
         self.state["last_processed_block"] = block_number
+        self._append_wal({"block": block_number})
 
-    def is_event_processed(self, event_hash: str) -> bool:
+    def is_event_processed(self, event_hash: bytes) -> bool:
         """Checks if a specific event has already been processed to prevent duplicates."""
-        # This is a simple implementation; a real system might use a more scalable DB.
-        return event_hash in self.state.get("processed_event_hashes", [])
+        # Duplicates only come from re-scanned blocks, which the exact window is sized to cover.
+        return event_hash in self.recent_event_hashes
 
-    def mark_event_as_processed(self, event_hash: str):
+    def mark_event_as_processed(self, event_hash: bytes):
         """Marks an event as processed."""
-        if "processed_event_hashes" not in self.state:
-            self.state["processed_event_hashes"] = []
-        self.state["processed_event_hashes"].append(event_hash)
-        # Prune old events to keep state file size manageable
-        max_events = 10000
-        if len(self.state["processed_event_hashes"]) > max_events:
-            self.state["processed_event_hashes"] = self.state["processed_event_hashes"][-max_events:]
+        self.recent_event_hashes.add(event_hash)
+        self._append_wal({"event": event_hash.hex()})
+
+
+def _build_mock_log_template() -> Dict[str, Any]:
+    """Builds one fully-formed mock TokensLocked log, encoded as a node returns it over JSON-RPC."""
+    # Indexed address topics are the 20 address bytes left-padded to 32 bytes.
+    user_topic = b'\x00' * 12 + random.randbytes(20)
+    token_topic = b'\x00' * 12 + random.randbytes(20)
+    amount = random.randint(100, 100000) * 10**18
+    dest_chain_id = 2 # The ID of the destination chain
+
+    # Encode data part according to ABI
+    data = abi_encode(['uint256', 'uint256'], [amount, dest_chain_id])
+
+    return {
+        'address': BRIDGE_CONTRACT_ADDRESS,
+        'topics': [
+            '0x' + EVENT_SIGNATURE_HASH.hex(),
+            '0x' + user_topic.hex(),
+            '0x' + token_topic.hex()
+        ],
+        'data': '0x' + data.hex(),
+        'blockNumber': None,
+        'transactionHash': None,
+        'transactionIndex': hex(random.randint(0, 10)),
+        'logIndex': hex(random.randint(0, 5)),
+        'removed': False
+    }
+
+
+def format_log_entry(raw_log: Dict[str, Any]) -> LogReceipt:
+    """Converts a JSON-RPC log from hex strings into HexBytes and ints, as web3.py does.
+
+    Applied once where logs enter the listener, so everything downstream works on bytes.
+    """
+    log = dict(raw_log)
+    log['topics'] = [HexBytes(topic) for topic in raw_log['topics']]
+    log['data'] = HexBytes(raw_log['data'])
+    log['transactionHash'] = HexBytes(raw_log['transactionHash'])
+    for field in ('blockNumber', 'transactionIndex', 'logIndex'):
+        if isinstance(raw_log.get(field), str):
+            log[field] = int(raw_log[field], 16)
+    return log
+
+
+MOCK_EVENT_PROBABILITY = 0.2 # 20% chance to have an event in a block
+_LOG_NO_MOCK_EVENT_PROBABILITY = math.log(1 - MOCK_EVENT_PROBABILITY)
+
+# Pre-built templates keep random generation and ABI encoding out of the simulated fetch path.
+MOCK_LOG_POOL_SIZE = 1024 # Must be a power of two
+_MOCK_LOG_POOL = [_build_mock_log_template() for _ in range(MOCK_LOG_POOL_SIZE)]
+
+
+def create_rpc_session() -> requests.Session:
+    """Creates an HTTP session whose pooled keep-alive connections are reused across RPC calls."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=64,
+        # Only connection failures are retried: the request never reached the node, so a
+        # transaction submission cannot be sent twice. Read errors are never retried.
+        max_retries=Retry(total=3, read=0, backoff_factor=0.5)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
 
 class MockBlockchainConnector:
     """A mock connector to simulate interactions with a blockchain RPC endpoint."""
-    def __init__(self, rpc_url: str, chain_name: str):
+    def __init__(self, rpc_url: str, chain_name: str, session: Optional[requests.Session] = None):
         self.rpc_url = rpc_url
         self.chain_name = chain_name
-        self.w3 = Web3() # Using Web3 for its utilities, without a real provider
+        # Any real RPC traffic goes through this pooled session, so repeated calls skip
+        # the TCP/TLS handshake. The provider is never queried by the mock itself.
+        self.session = session or create_rpc_session()
+        self.w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={'timeout': RPC_TIMEOUT_SECONDS}, session=self.session))
         self.current_block = random.randint(10000, 20000)
         self.is_connected = False
-        logging.info(f"[{self.chain_name}] MockConnector initialized for {self.rpc_url}")
+        logger.info("[%s] MockConnector initialized for %s", self.chain_name, self.rpc_url)
 
     def connect(self):
         """Simulates connecting to the RPC endpoint."""
@@ -115,12 +373,12 @@ class MockBlockchainConnector:
             if 'fail' in self.rpc_url:
                 raise requests.exceptions.ConnectionError("Mock connection failed")
             self.is_connected = True
-            logging.info(f"[{self.chain_name}] Successfully connected to mock RPC endpoint.")
+            logger.info("[%s] Successfully connected to mock RPC endpoint.", self.chain_name)
         except requests.exceptions.ConnectionError as e:
-            logging.error(f"[{self.chain_name}] Failed to connect to {self.rpc_url}: {e}")
+            logger.error("[%s] Failed to connect to %s: %s", self.chain_name, self.rpc_url, e)
             self.is_connected = False
 
-    def get_latest_block(self) -> int:
+    async def get_latest_block(self) -> int:
         """Simulates fetching the latest block number and advances the chain state."""
         if not self.is_connected:
             raise ConnectionError("Not connected to the blockchain RPC.")
@@ -128,45 +386,77 @@ class MockBlockchainConnector:
         self.current_block += random.randint(1, 3)
         return self.current_block
 
-    def get_events_for_range(self, from_block: int, to_block: int) -> List[LogReceipt]:
-        """Simulates fetching event logs for a given block range."""
+    async def get_events_for_range(self, from_block: int, to_block: int) -> List[LogReceipt]:
+        """Fetches event logs for a block range using batched JSON-RPC eth_getLogs requests."""
         if not self.is_connected:
-            raise ConnectionError("Not connected to the blockchain RPC.
-")
-        
+            raise ConnectionError("Not connected to the blockchain RPC.")
+
+        rpc_requests = self._build_get_logs_requests(from_block, to_block)
+        batches = [rpc_requests[i:i + RPC_BATCH_MAX_REQUESTS] for i in range(0, len(rpc_requests), RPC_BATCH_MAX_REQUESTS)]
+        semaphore = asyncio.Semaphore(RPC_MAX_CONCURRENT_BATCHES)
+
+        async def send(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self._send_batch(batch)
+
+        responses = await asyncio.gather(*(send(batch) for batch in batches))
+
+        # Batch responses may arrive in any order, so dispatch them by request id.
+        responses_by_id = {response['id']: response for batch in responses for response in batch}
         logs = []
-        for block_num in range(from_block, to_block + 1):
-            # Sporadically generate a mock event
-            if random.random() < 0.2: # 20% chance to have an event in a block
-                mock_log = self._create_mock_log(block_num)
-                logs.append(mock_log)
-                logging.info(f"[{self.chain_name}] Found mock event in block {block_num}")
+        for request in rpc_requests:
+            response = responses_by_id.get(request['id'])
+            if response is None or 'error' in response:
+                raise ConnectionError(f"eth_getLogs request {request['id']} failed: {(response or {}).get('error', 'no response')}")
+            # Logs arrive hex-encoded on the wire; decode them once, here at the RPC boundary.
+            logs.extend(format_log_entry(raw_log) for raw_log in response['result'])
         return logs
 
-    def _create_mock_log(self, block_number: int) -> LogReceipt:
-        """Generates a single mock log entry consistent with the ABI."""
-        user_address = Web3.to_checksum_address(f'0x{random.randbytes(20).hex()}')
-        token_address = Web3.to_checksum_address(f'0x{random.randbytes(20).hex()}')
-        amount = random.randint(100, 100000) * 10**18
-        dest_chain_id = 2 # The ID of the destination chain
-
-        # Encode data part according to ABI
-        data = abi_decode(['uint256', 'uint256'], b'')[0](amount, dest_chain_id)
-
-        log_entry = {
-            'address': BRIDGE_CONTRACT_ADDRESS,
-            'topics': [
-                EVENT_SIGNATURE_HASH,
-                '0x' + user_address[2:].zfill(64),
-                '0x' + token_address[2:].zfill(64)
-            ],
-            'data': '0x' + data.hex(),
-            'blockNumber': block_number,
-            'transactionHash': '0x' + random.randbytes(32).hex(),
-            'transactionIndex': random.randint(0, 10),
-            'logIndex': random.randint(0, 5),
-            'removed': False
-        }
+    def _build_get_logs_requests(self, from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        """Splits a block range into eth_getLogs JSON-RPC requests of GET_LOGS_BLOCK_RANGE blocks each."""
+        return [
+            {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": "eth_getLogs",
+                "params": [{
+                    "fromBlock": hex(start),
+                    "toBlock": hex(min(start + GET_LOGS_BLOCK_RANGE - 1, to_block)),
+                    "address": BRIDGE_CONTRACT_ADDRESS,
+                    "topics": ['0x' + EVENT_SIGNATURE_HASH.hex()]
+                }]
+            }
+            for request_id, start in enumerate(range(from_block, to_block + 1, GET_LOGS_BLOCK_RANGE))
+        ]
+
+    async def _send_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Simulates POSTing a JSON-RPC batch and receiving all of its responses in one round-trip."""
+        await asyncio.sleep(MOCK_RPC_ROUND_TRIP_SECONDS)
+        return [self._handle_get_logs(request) for request in batch]
+
+    def _handle_get_logs(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Simulates the node answering a single eth_getLogs request."""
+        params = request['params'][0]
+        to_block = int(params['toBlock'], 16)
+        logs = []
+        block_num = int(params['fromBlock'], 16) - 1
+        while True:
+            # Each block has an event with probability MOCK_EVENT_PROBABILITY, so the gap to the
+            # next event is geometric. Sampling the gap directly draws one random number per
+            # event instead of one per block.
+            block_num += 1 + int(math.log(1.0 - random.random()) / _LOG_NO_MOCK_EVENT_PROBABILITY)
+            if block_num > to_block:
+                break
+            logs.append(self._create_mock_log(block_num))
+            logger.info("[%s] Found mock event in block %s", self.chain_name, block_num)
+        return {"jsonrpc": "2.0", "id": request['id'], "result": logs}
+
+    def _create_mock_log(self, block_number: int) -> Dict[str, Any]:
+        """Generates a single hex-encoded mock log entry consistent with the ABI from the template pool."""
+        log_entry = _MOCK_LOG_POOL[block_number & (MOCK_LOG_POOL_SIZE - 1)].copy()
+        log_entry['blockNumber'] = hex(block_number)
+        # The transaction hash must stay unique, since it keys event deduplication.
+        log_entry['transactionHash'] = f"0x{random.getrandbits(256):064x}"
         return log_entry
 
 
@@ -180,35 +470,67 @@ class EventParser:
         self.indexed_inputs = [inp for inp in self.event_abi['inputs'] if inp['indexed']]
         self.non_indexed_inputs = [inp for inp in self.event_abi['inputs'] if not inp['indexed']]
 
+        # Resolve everything derived from the ABI once, so parse_log only touches the log itself.
+        self._signature_topic = event_abi_to_log_topic(self.event_abi)
+        self._signature_topic_hex = '0x' + self._signature_topic.hex()
+        self._data_types = tuple(inp['type'] for inp in self.non_indexed_inputs)
+        self._decode = partial(default_codec.decode, self._data_types)
+        self._decode_fields = self._compile_decoder()
+
+    def _compile_decoder(self):
+        """Generates a straight-line decoder specialized to this event's ABI.
+
+        Unrolling the field layout at construction time leaves no loops, branches or ABI
+        lookups in the per-log path. Topics and data are expected as (Hex)Bytes, as web3
+        returns them.
+        """
+        fields = [f"{'event_name'!r}: {self.event_abi['name']!r}"]
+        # Topic 0 is the event signature; indexed inputs follow in order.
+        for position, inp in enumerate(self.indexed_inputs, start=1):
+            if inp['type'] == 'address':
+                # HexBytes slicing goes through Python code; a plain bytes copy slices in C.
+                value = f"_checksum(_bytes(t[{position}])[-20:])"
+            else:
+                value = f"_decode_topic(({inp['type']!r},), t[{position}])[0]"
+            fields.append(f"{inp['name']!r}: {value}")
+        for index, inp in enumerate(self.non_indexed_inputs):
+            fields.append(f"{inp['name']!r}: d[{index}]")
+        fields.append("'transactionHash': log['transactionHash']")
+        fields.append("'blockNumber': log['blockNumber']")
+
+        lines = ["def _decode_fields(log):", "    t = log['topics']"]
+        if self.non_indexed_inputs:
+            lines.append("    d = _decode(log['data'])")
+        lines.append("    return {" + ", ".join(fields) + "}")
+
+        namespace = {
+            '_decode': self._decode,
+            '_decode_topic': default_codec.decode,
+            '_checksum': _cached_checksum_address,
+            '_bytes': bytes,
+        }
+        exec(compile("\n".join(lines), f"<{self.event_abi['name']} decoder>", 'exec'), namespace)
+        return namespace['_decode_fields']
+
     def parse_log(self, log: LogReceipt) -> Optional[Dict[str, Any]]:
         """Decodes a raw log into a dictionary of event parameters."""
+        # Reject logs of other events before doing any decoding work.
+        topics = log.get('topics')
+        if not topics:
+            return None
+        # Logs that bypassed the connector may still be hex-encoded; compare those as strings.
+        is_hex_encoded = isinstance(topics[0], str)
+        if is_hex_encoded:
+            if topics[0].lower() != self._signature_topic_hex:
+                return None
+        elif topics[0] != self._signature_topic:
+            return None
         try:
-            parsed_event = {"event_name": self.event_abi['name']}
-
-            # Decode indexed topics (skipping the first topic, which is the event signature)
-            for i, inp in enumerate(self.indexed_inputs):
-                topic_data = log['topics'][i + 1]
-                # Addresses are directly represented in topics
-                if inp['type'] == 'address':
-                    parsed_event[inp['name']] = Web3.to_checksum_address(f"0x{topic_data[-40:]}")
-                else:
-                    # For other types, proper decoding is needed
-                    parsed_event[inp['name']] = abi_decode([inp['type']], topic_data)[0]
-            
-            # Decode non-indexed data
-            data_types = [inp['type'] for inp in self.non_indexed_inputs]
-            decoded_data = abi_decode(data_types, bytes.fromhex(log['data'][2:]))
-            
-            for i, inp in enumerate(self.non_indexed_inputs):
-                parsed_event[inp['name']] = decoded_data[i]
-            
-            # Add metadata
-            parsed_event['transactionHash'] = log['transactionHash']
-            parsed_event['blockNumber'] = log['blockNumber']
-
-            return parsed_event
-        except Exception as e:
-            logging.error(f"Failed to parse log {log.get('transactionHash')}: {e}")
+            if is_hex_encoded:
+                log = format_log_entry(log)
+            return self._decode_fields(log)
+        except (ValueError, KeyError, IndexError, TypeError, DecodingError) as e:
+            logger.error("Failed to parse log %s: %s", log.get('transactionHash'), e)
             return None
 
 
@@ -217,63 +539,68 @@ class TransactionRelayer:
     def __init__(self, dest_connector: MockBlockchainConnector):
         self.dest_connector = dest_connector
 
-    def simulate_relay_transaction(self, event_data: Dict[str, Any]):
+    async def simulate_relay_transaction(self, event_data: Dict[str, Any]):
         """Simulates signing and sending a mint transaction on the destination chain."""
-        logging.info(f"[{self.dest_connector.chain_name}] Relaying transaction for user {event_data['user']}...")
-        logging.info(f"[{self.dest_connector.chain_name}]   - Amount: {event_data['amount'] / 10**18}")
-        logging.info(f"[{self.dest_connector.chain_name}]   - Original Tx: {event_data['transactionHash']}")
+        logger.info("[%s] Relaying transaction for user %s...", self.dest_connector.chain_name, event_data['user'])
+        logger.info("[%s]   - Amount: %s", self.dest_connector.chain_name, event_data['amount'] / 10**18)
+        logger.info("[%s]   - Original Tx: %s", self.dest_connector.chain_name, event_data['transactionHash'].hex())
         
         # Simulate network latency and transaction processing
-        time.sleep(random.uniform(1, 3))
+        await asyncio.sleep(random.uniform(1, 3))
         
         # Simulate potential failure
         if random.random() < 0.05: # 5% failure chance
-            logging.error(f"[{self.dest_connector.chain_name}] FAILED to relay transaction for {event_data['transactionHash']}.")
+            logger.error("[%s] FAILED to relay transaction for %s.", self.dest_connector.chain_name, event_data['transactionHash'].hex())
             return False
         
         mock_dest_tx_hash = '0x' + random.randbytes(32).hex()
-        logging.info(f"[{self.dest_connector.chain_name}] Transaction successfully relayed. Destination Tx Hash: {mock_dest_tx_hash}")
+        logger.info("[%s] Transaction successfully relayed. Destination Tx Hash: %s", self.dest_connector.chain_name, mock_dest_tx_hash)
         return True
 
 
 class CrossChainBridgeListener:
     """The main orchestrator that listens for events and coordinates the bridging process."""
     def __init__(self, source_chain_rpc: str, dest_chain_rpc: str, contract_address: str):
-        self.source_connector = MockBlockchainConnector(source_chain_rpc, 'SourceChain')
-        self.dest_connector = MockBlockchainConnector(dest_chain_rpc, 'DestChain')
+        # Both connectors share one connection pool.
+        self.rpc_session = create_rpc_session()
+        self.source_connector = MockBlockchainConnector(source_chain_rpc, 'SourceChain', self.rpc_session)
+        self.dest_connector = MockBlockchainConnector(dest_chain_rpc, 'DestChain', self.rpc_session)
         self.contract_address = contract_address
-        self.state_db = StateDB(STATE_FILE)
+        self._executor = ThreadPoolExecutor(max_workers=LISTENER_WORKER_THREADS)
+        self.state_db = StateDB(STATE_FILE, self._executor)
         self.event_parser = EventParser(BRIDGE_ABI)
         self.relayer = TransactionRelayer(self.dest_connector)
         self.is_running = False
 
-    def run(self):
+    async def run(self):
         """Starts the main event listening loop."""
-        logging.info("Initializing Cross-Chain Bridge Listener...")
-        self.source_connector.connect()
-        self.dest_connector.connect()
+        logger.info("Initializing Cross-Chain Bridge Listener...")
+        # Connect to both chains concurrently rather than one after the other.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            loop.run_in_executor(self._executor, self.source_connector.connect),
+            loop.run_in_executor(self._executor, self.dest_connector.connect)
+        )
 
         if not self.source_connector.is_connected:
-            logging.critical("Cannot start listener: failed to connect to source chain.")
+            logger.critical("Cannot start listener: failed to connect to source chain.")
             return
         
         self.is_running = True
-        logging.info("Listener started. Polling for new blocks...")
+        logger.info("Listener started. Polling for new blocks...")
         
         while self.is_running:
             try:
-                self._process_new_blocks()
-                time.sleep(POLLING_INTERVAL_SECONDS)
-            except KeyboardInterrupt:
-                self.shutdown()
+                await self._process_new_blocks()
+                await asyncio.sleep(POLLING_INTERVAL_SECONDS)
             except Exception as e:
-                logging.error(f"An unexpected error occurred in the main loop: {e}")
-                time.sleep(POLLING_INTERVAL_SECONDS * 2) # Longer sleep after an error
+                logger.error("An unexpected error occurred in the main loop: %s", e)
+                await asyncio.sleep(POLLING_INTERVAL_SECONDS * 2) # Longer sleep after an error
 
-    def _process_new_blocks(self):
+    async def _process_new_blocks(self):
         """Fetches and processes blocks since the last check."""
         last_processed = self.state_db.get_last_processed_block()
-        latest_block = self.source_connector.get_latest_block()
+        latest_block = await self.source_connector.get_latest_block()
 
         # The `to_block` is calculated ensuring we have enough confirmations.
         # This is a simplified re-org protection mechanism.
@@ -281,47 +608,70 @@ class CrossChainBridgeListener:
         from_block = last_processed + 1
 
         if from_block > to_block:
-            logging.debug(f"No new blocks to process. Current head: {latest_block}, waiting for confirmations.")
+            logger.debug("No new blocks to process. Current head: %s, waiting for confirmations.", latest_block)
             return
         
         # To avoid overwhelming the RPC, process in batches.
         if to_block - from_block > BLOCK_PROCESSING_BATCH_SIZE:
             to_block = from_block + BLOCK_PROCESSING_BATCH_SIZE - 1
 
-        logging.info(f"Scanning blocks from {from_block} to {to_block}...")
+        logger.info("Scanning blocks from %s to %s...", from_block, to_block)
         
         try:
-            logs = self.source_connector.get_events_for_range(from_block, to_block)
+            logs = await self.source_connector.get_events_for_range(from_block, to_block)
             
             if not logs:
-                logging.debug(f"No relevant events found in blocks {from_block}-{to_block}.")
+                logger.debug("No relevant events found in blocks %s-%s.", from_block, to_block)
             else:
+                pending = {}
                 for log in logs:
-                    event_hash = Web3.keccak(text=f"{log['transactionHash']}{log['logIndex']}").hex()
-                    if self.state_db.is_event_processed(event_hash):
-                        logging.warning(f"Skipping already processed event: {event_hash}")
+                    event_hash = self._event_hash(log)
+                    if event_hash in pending or self.state_db.is_event_processed(event_hash):
+                        logger.warning("Skipping already processed event: 0x%s", event_hash.hex())
                         continue
 
                     parsed_event = self.event_parser.parse_log(log)
                     if parsed_event:
-                        logging.info(f"Processing new event: {parsed_event}")
-                        if self.relayer.simulate_relay_transaction(parsed_event):
+                        logger.debug("Processing new event: %s", parsed_event)
+                        pending[event_hash] = parsed_event
+
+                # Relays are independent and network-bound, so run them concurrently.
+                semaphore = asyncio.Semaphore(RELAY_MAX_CONCURRENCY)
+
+                async def relay(event_hash: bytes, parsed_event: Dict[str, Any]):
+                    async with semaphore:
+                        if await self.relayer.simulate_relay_transaction(parsed_event):
                             self.state_db.mark_event_as_processed(event_hash)
+
+                await asyncio.gather(*(relay(event_hash, parsed_event) for event_hash, parsed_event in pending.items()))
             
             # Update state only after the batch is processed
             self.state_db.set_last_processed_block(to_block)
-            self.state_db.save_state()
+            self.state_db.maybe_flush()
 
         except Exception as e:
-            logging.error(f"Error processing block range {from_block}-{to_block}: {e}")
+            logger.error("Error processing block range %s-%s: %s", from_block, to_block, e)
+
+    @staticmethod
+    def _event_hash(log: LogReceipt) -> bytes:
+        """Computes the deduplication key of a log: keccak(transaction hash bytes || 4-byte log index)."""
+        tx_hash = log['transactionHash']
+        if not isinstance(tx_hash, bytes):
+            tx_hash = bytes.fromhex(tx_hash[2:])
+        log_index = log['logIndex']
+        if isinstance(log_index, str):
+            log_index = int(log_index, 16)
+        return keccak(tx_hash + log_index.to_bytes(4, 'big'))
 
     def shutdown(self):
         """Performs a graceful shutdown of the listener."""
         if self.is_running:
-            logging.info("Shutting down the listener...")
+            logger.info("Shutting down the listener...")
             self.is_running = False
-            self.state_db.save_state()
-            logging.info("Final state saved. Goodbye!")
+            self.state_db.close()
+            self._executor.shutdown()
+            self.rpc_session.close()
+            logger.info("Final state saved. Goodbye!")
 
 
 if __name__ == '__main__':
@@ -330,4 +680,7 @@ if __name__ == '__main__':
         dest_chain_rpc=DEST_CHAIN_RPC,
         contract_address=BRIDGE_CONTRACT_ADDRESS
     )
-    listener.run()
+    try:
+        asyncio.run(listener.run())
+    except KeyboardInterrupt:
+        listener.shutdown()
@@ -0,0 +1,157 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import script  # noqa: E402
+from script import StateDB  # noqa: E402
+
+
+def event_hash(n: int) -> bytes:
+    return n.to_bytes(32, 'big')
+
+
+class StateDBTestCase(unittest.TestCase):
+    """Round-trips StateDB through its snapshot, WAL and compaction recovery paths."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.filepath = os.path.join(self.tmpdir, 'state.json')
+        # Every StateDB registers close() at exit; keep test instances out of that.
+        patcher = mock.patch.object(script.atexit, 'register')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open_db(self, executor=None) -> StateDB:
+        db = StateDB(self.filepath, executor)
+        self.addCleanup(db.close)
+        return db
+
+    def test_round_trip_through_snapshot(self):
+        db = self.open_db()
+        for n in range(5):
+            db.mark_event_as_processed(event_hash(n))
+        db.set_last_processed_block(42)
+        db.close()
+
+        self.assertFalse(os.path.exists(db.wal_filepath) and os.path.getsize(db.wal_filepath))
+        reloaded = self.open_db()
+        self.assertEqual(reloaded.get_last_processed_block(), 42)
+        for n in range(5):
+            self.assertTrue(reloaded.is_event_processed(event_hash(n)))
+        self.assertFalse(reloaded.is_event_processed(event_hash(99)))
+
+    def test_replays_wal_without_compaction(self):
+        db = self.open_db()
+        db.mark_event_as_processed(event_hash(1))
+        db.set_last_processed_block(7)
+        # Not due for compaction: only the WAL buffer reaches the OS, as before a crash.
+        db.maybe_flush()
+        self.assertFalse(os.path.exists(self.filepath))
+
+        reloaded = self.open_db()
+        self.assertEqual(reloaded.get_last_processed_block(), 7)
+        self.assertTrue(reloaded.is_event_processed(event_hash(1)))
+
+    def test_torn_final_record_is_truncated(self):
+        db = self.open_db()
+        db.set_last_processed_block(3)
+        db.maybe_flush()
+        with open(db.wal_filepath, 'ab') as f:
+            f.write(b'{"block":9}')  # Missing its newline: a torn write.
+
+        reloaded = self.open_db()
+        self.assertEqual(reloaded.get_last_processed_block(), 3)
+        reloaded.set_last_processed_block(5)
+        reloaded.maybe_flush()
+        with open(reloaded.wal_filepath, 'rb') as f:
+            self.assertEqual(f.read(), b'{"block":3}\n{"block":5}\n')
+
+        self.assertEqual(self.open_db().get_last_processed_block(), 5)
+
+    def test_replays_compacting_wal_before_live_wal(self):
+        wal_filepath = os.path.join(self.tmpdir, 'state.wal')
+        with open(wal_filepath + '.compacting', 'wb') as f:
+            f.write(b'{"block":5}\n{"event":"%s"}\n' % event_hash(1).hex().encode())
+        with open(wal_filepath, 'wb') as f:
+            f.write(b'{"block":7}\n')
+
+        db = self.open_db()
+        self.assertEqual(db.get_last_processed_block(), 7)
+        self.assertTrue(db.is_event_processed(event_hash(1)))
+
+    def test_failed_compaction_is_carried_into_next_rotation(self):
+        db = self.open_db()
+        db.mark_event_as_processed(event_hash(1))
+        db.set_last_processed_block(10)
+        # A directory in place of the temporary snapshot file makes the write fail.
+        os.mkdir(self.filepath + '.tmp')
+        db.maybe_flush(force=True)
+        self.assertFalse(os.path.exists(self.filepath))
+        self.assertTrue(os.path.exists(db.compacting_wal_filepath))
+
+        os.rmdir(self.filepath + '.tmp')
+        db.mark_event_as_processed(event_hash(2))
+        db.set_last_processed_block(20)
+        db.maybe_flush(force=True)
+        self.assertFalse(os.path.exists(db.compacting_wal_filepath))
+        db.close()
+
+        reloaded = self.open_db()
+        self.assertEqual(reloaded.get_last_processed_block(), 20)
+        self.assertTrue(reloaded.is_event_processed(event_hash(1)))
+        self.assertTrue(reloaded.is_event_processed(event_hash(2)))
+
+    def test_background_compaction_keeps_records_logged_meanwhile(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        db = self.open_db(executor)
+        db.mark_event_as_processed(event_hash(1))
+        with mock.patch.object(script, 'STATE_COMPACTION_MAX_WAL_RECORDS', 1):
+            db.maybe_flush()
+        db.mark_event_as_processed(event_hash(2))
+        db.set_last_processed_block(30)
+        db.maybe_flush()
+        db._compaction.result()
+        db._wal.flush()
+
+        reloaded = self.open_db()
+        self.assertEqual(reloaded.get_last_processed_block(), 30)
+        self.assertTrue(reloaded.is_event_processed(event_hash(1)))
+        self.assertTrue(reloaded.is_event_processed(event_hash(2)))
+
+    def test_background_compaction_failure_is_logged(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        db = self.open_db(executor)
+        db.set_last_processed_block(1)
+        db.state['unserializable'] = {1}
+        with mock.patch.object(script, 'STATE_COMPACTION_MAX_WAL_RECORDS', 1):
+            db.maybe_flush()
+        db._compaction.exception()
+        del db.state['unserializable']
+        with self.assertLogs(script.logger, 'ERROR'):
+            db.maybe_flush()
+        self.assertTrue(os.path.exists(db.compacting_wal_filepath))
+
+    def test_window_survives_reload_at_capacity(self):
+        db = self.open_db()
+        total = script.RECENT_EVENTS_WINDOW + 10
+        for n in range(total):
+            db.mark_event_as_processed(event_hash(n))
+        db.close()
+
+        reloaded = self.open_db()
+        self.assertEqual(len(reloaded.recent_event_hashes), script.RECENT_EVENTS_WINDOW)
+        self.assertTrue(reloaded.is_event_processed(event_hash(total - 1)))
+        self.assertFalse(reloaded.is_event_processed(event_hash(0)))
+
+
+if __name__ == '__main__':
+    unittest.main()